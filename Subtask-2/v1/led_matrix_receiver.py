@@ -8,6 +8,14 @@ from typing import List, Tuple, Optional, Dict
 import json
 
 class LEDMatrixReceiver:
+    # Map quadrant colors to 2-bit values
+    COLOR_TO_BITS = {
+        'black': 0,
+        'red': 1,
+        'green': 2,
+        'blue': 3
+    }
+    
     def __init__(self, matrix_size=(16, 16), debug=False):
         self.matrix_size = matrix_size
         self.debug = debug
@@ -25,6 +33,8 @@ class LEDMatrixReceiver:
         
         # State tracking
         self.matrix_corners = None
+        self.transform_corners = None
+        self.transform_matrix = None
         self.calibrated = False
         self.frame_buffer = deque(maxlen=1000)
         self.current_password = ""
@@ -45,6 +55,8 @@ class LEDMatrixReceiver:
             'cyan': (255, 255, 0),
             'purple': (255, 0, 255)
         }
+        self.color_names = np.array(list(self.colors.keys()), dtype=object)
+        self.color_values = np.array(list(self.colors.values()), dtype=np.int32)
         
     def detect_matrix_region(self, frame):
         """Detect the LED matrix region in the frame using corner markers"""
@@ -113,20 +125,23 @@ class LEDMatrixReceiver:
         matrix_width = 160  # 16cm = 160 pixels at 1px/mm
         matrix_height = 160
         
-        dst_corners = np.array([
-            [0, 0],
-            [matrix_width, 0],
-            [matrix_width, matrix_height],
-            [0, matrix_height]
-        ], dtype=np.float32)
-        
-        transform_matrix = cv2.getPerspectiveTransform(
-            self.matrix_corners.astype(np.float32), 
-            dst_corners
-        )
+        # Corners are fixed once detected, so only rebuild the transform when they change
+        if self.transform_corners is not self.matrix_corners:
+            dst_corners = np.array([
+                [0, 0],
+                [matrix_width, 0],
+                [matrix_width, matrix_height],
+                [0, matrix_height]
+            ], dtype=np.float32)
+            
+            self.transform_matrix = cv2.getPerspectiveTransform(
+                self.matrix_corners.astype(np.float32), 
+                dst_corners
+            )
+            self.transform_corners = self.matrix_corners
         
         # Apply perspective transformation
-        corrected = cv2.warpPerspective(frame, transform_matrix, (matrix_width, matrix_height))
+        corrected = cv2.warpPerspective(frame, self.transform_matrix, (matrix_width, matrix_height))
         
         # Extract individual pixel values
         pixel_data = np.zeros((self.matrix_size[1], self.matrix_size[0], 3), dtype=np.uint8)
@@ -153,16 +168,18 @@ class LEDMatrixReceiver:
     
     def classify_color(self, bgr_color):
         """Classify a BGR color to the nearest predefined color"""
-        min_distance = float('inf')
-        best_color = 'black'
-        
-        for color_name, color_bgr in self.colors.items():
-            distance = np.sqrt(np.sum((np.array(bgr_color) - np.array(color_bgr))**2))
-            if distance < min_distance:
-                min_distance = distance
-                best_color = color_name
-        
-        return best_color if min_distance < self.color_similarity_threshold else 'black'
+        return self.classify_colors(bgr_color).item()
+    
+    def classify_colors(self, bgr_colors):
+        """Classify an array of BGR colors (last axis BGR) to the nearest predefined colors"""
+        # Squared distance from every color to every reference color in one pass
+        diff = np.asarray(bgr_colors, dtype=np.int32)[..., np.newaxis, :] - self.color_values
+        sq_distances = np.sum(diff * diff, axis=-1)
+        best = np.argmin(sq_distances, axis=-1)
+        
+        # Compare against the squared threshold to avoid the sqrt
+        within = np.min(sq_distances, axis=-1) < self.color_similarity_threshold ** 2
+        return np.where(within, self.color_names[best], 'black')
     
     def analyze_frame_pattern(self, pixel_data):
         """Analyze the pattern in the current frame"""
@@ -170,11 +187,7 @@ class LEDMatrixReceiver:
             return None
         
         # Convert to color classifications
-        color_matrix = np.zeros((self.matrix_size[1], self.matrix_size[0]), dtype=object)
-        
-        for y in range(self.matrix_size[1]):
-            for x in range(self.matrix_size[0]):
-                color_matrix[y, x] = self.classify_color(pixel_data[y, x])
+        color_matrix = self.classify_colors(pixel_data)
         
         # Analyze pattern type
         pattern_type = self.detect_pattern_type(color_matrix)
@@ -188,10 +201,7 @@ class LEDMatrixReceiver:
     def detect_pattern_type(self, color_matrix):
         """Detect what type of pattern is being displayed"""
         # Count different colors
-        unique_colors = set()
-        for row in color_matrix:
-            for color in row:
-                unique_colors.add(color)
+        unique_colors = set(color_matrix.ravel())
         
         # Check for specific patterns
         if len(unique_colors) == 1:
@@ -233,17 +243,9 @@ class LEDMatrixReceiver:
         bottom_left = color_matrix[mid_y + mid_y//2, mid_x//2]
         bottom_right = color_matrix[mid_y + mid_y//2, mid_x + mid_x//2]
         
-        # Map colors to bit values
-        color_to_bits = {
-            'black': 0,
-            'red': 1,
-            'green': 2,
-            'blue': 3
-        }
-        
         # Decode quadrant values
-        top_left_val = color_to_bits.get(top_left, 0)
-        top_right_val = color_to_bits.get(top_right, 0)
+        top_left_val = self.COLOR_TO_BITS.get(top_left, 0)
+        top_right_val = self.COLOR_TO_BITS.get(top_right, 0)
         bottom_left_val = 1 if bottom_left == 'white' else 0
         bottom_right_val = 1 if bottom_right == 'white' else 0
         
@@ -405,11 +407,11 @@ class LEDMatrixReceiver:
             
             # Show frame if debugging
             if self.debug:
-                display_frame = frame.copy()
+                # Frame data has already been extracted, so draw the overlay in place
                 if self.matrix_corners is not None:
-                    cv2.polylines(display_frame, [self.matrix_corners.astype(int)], True, (0, 255, 0), 2)
+                    cv2.polylines(frame, [self.matrix_corners.astype(int)], True, (0, 255, 0), 2)
                 
-                cv2.imshow('LED Matrix Receiver', display_frame)
+                cv2.imshow('LED Matrix Receiver', frame)
                 
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
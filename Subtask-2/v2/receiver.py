@@ -7,10 +7,11 @@ from dataclasses import dataclass
 from typing import List, Tuple, Optional
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Password character for each 6-bit value (values past 'Z' fall back to 'A')
+CHAR_TABLE = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ" + "A" * 28
+
 @dataclass
 class DetectionConfig:
     """Configuration for LED matrix detection"""
@@ -29,16 +30,19 @@ class FrameBuffer:
         self.lock = threading.Lock()
     
     def add_frame(self, frame: np.ndarray, timestamp: float):
+        # VideoCapture.read() hands back a fresh array per call, so store it without copying
         with self.lock:
-            self.buffer.append((frame.copy(), timestamp))
+            self.buffer.append((frame, timestamp))
     
     def get_latest_frame(self) -> Optional[Tuple[np.ndarray, float]]:
         with self.lock:
             return self.buffer[-1] if self.buffer else None
     
     def get_frames_in_range(self, start_time: float, end_time: float) -> List[Tuple[np.ndarray, float]]:
+        # Snapshot under the lock and filter outside it so capture is not blocked
         with self.lock:
-            return [(frame, ts) for frame, ts in self.buffer if start_time <= ts <= end_time]
+            snapshot = tuple(self.buffer)
+        return [(frame, ts) for frame, ts in snapshot if start_time <= ts <= end_time]
 
 class LEDMatrixDetector:
     """Main detector class for LED matrix communication"""
@@ -50,6 +54,18 @@ class LEDMatrixDetector:
         self.is_calibrated = False
         self.detected_frames = []
         self.transmission_start_time = None
+        self.transform_corners = None
+        self.transform_matrix = None
+        
+        # Flat Z-pattern index for each grid cell (odd rows run right to left)
+        size = config.matrix_size
+        z_order = np.arange(size * size).reshape(size, size)
+        z_order[1::2] = z_order[1::2, ::-1]
+        self.z_pattern_index = z_order.ravel()
+        
+        # Reference checkerboard for calib2 detection
+        rows, cols = np.indices((size, size))
+        self.checkerboard = (rows + cols) % 2 == 0
         
     def find_matrix_corners(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """Find the 4 corner markers of the LED matrix"""
@@ -94,18 +110,20 @@ class LEDMatrixDetector:
         """Extract and rectify the LED matrix region"""
         # Define target rectangle (square matrix)
         target_size = 320  # Larger size for better pixel detection
-        target_corners = np.array([
-            [0, 0],
-            [target_size, 0],
-            [target_size, target_size],
-            [0, target_size]
-        ], dtype=np.float32)
         
-        # Compute perspective transform
-        transform_matrix = cv2.getPerspectiveTransform(corners, target_corners)
+        # Compute perspective transform only when the corners change
+        if self.transform_corners is not corners:
+            target_corners = np.array([
+                [0, 0],
+                [target_size, 0],
+                [target_size, target_size],
+                [0, target_size]
+            ], dtype=np.float32)
+            self.transform_matrix = cv2.getPerspectiveTransform(corners, target_corners)
+            self.transform_corners = corners
         
         # Apply transform
-        rectified = cv2.warpPerspective(frame, transform_matrix, (target_size, target_size))
+        rectified = cv2.warpPerspective(frame, self.transform_matrix, (target_size, target_size))
         
         return rectified
     
@@ -117,44 +135,24 @@ class LEDMatrixDetector:
         blurred = cv2.GaussianBlur(gray, (3, 3), 0)
         
         # Divide into 16x16 grid
+        size = self.config.matrix_size
         height, width = blurred.shape
-        cell_h = height // self.config.matrix_size
-        cell_w = width // self.config.matrix_size
-        
-        led_states = np.zeros((self.config.matrix_size, self.config.matrix_size), dtype=bool)
-        
-        for row in range(self.config.matrix_size):
-            for col in range(self.config.matrix_size):
-                # Extract cell region
-                y1 = row * cell_h
-                y2 = (row + 1) * cell_h
-                x1 = col * cell_w
-                x2 = (col + 1) * cell_w
-                
-                cell = blurred[y1:y2, x1:x2]
-                
-                # Calculate average brightness
-                avg_brightness = np.mean(cell)
-                
-                # Threshold to determine LED state
-                led_states[row, col] = avg_brightness > self.config.brightness_threshold
+        cell_h = height // size
+        cell_w = width // size
+        
+        # Average brightness of every cell at once
+        cells = blurred[:cell_h * size, :cell_w * size].reshape(size, cell_h, size, cell_w)
+        avg_brightness = cells.mean(axis=(1, 3))
+        
+        # Threshold to determine LED state
+        led_states = avg_brightness > self.config.brightness_threshold
         
         return led_states
     
     def convert_to_z_pattern(self, led_states: np.ndarray) -> np.ndarray:
         """Convert 2D LED states to 1D array following Z-pattern"""
-        z_pattern = np.zeros(self.config.matrix_size * self.config.matrix_size, dtype=bool)
-        
-        for row in range(self.config.matrix_size):
-            for col in range(self.config.matrix_size):
-                if row % 2 == 0:
-                    # Even row: left to right
-                    index = row * self.config.matrix_size + col
-                else:
-                    # Odd row: right to left
-                    index = row * self.config.matrix_size + (self.config.matrix_size - 1 - col)
-                
-                z_pattern[index] = led_states[row, col]
+        # Reversing odd rows is its own inverse, so the same index maps both ways
+        z_pattern = led_states.ravel()[self.z_pattern_index]
         
         return z_pattern
     
@@ -185,32 +183,30 @@ class LEDMatrixDetector:
                 if np.sum(led_states) > 0.9 * self.config.matrix_size**2:
                     if not calib1_detected:
                         calib1_detected = True
-                        logger.info(f"Calibration pattern 1 detected at {timestamp}")
+                        logger.info("Calibration pattern 1 detected at %s", timestamp)
                 
                 # Check for checkerboard pattern (calib2)
                 elif self.is_checkerboard_pattern(led_states):
                     if not calib2_detected:
                         calib2_detected = True
                         self.transmission_start_time = timestamp
-                        logger.info(f"Calibration pattern 2 detected at {timestamp}")
+                        logger.info("Calibration pattern 2 detected at %s", timestamp)
+                
+                # Remaining frames cannot change the outcome once both are found
+                if calib1_detected and calib2_detected:
+                    break
         
         return calib1_detected and calib2_detected
     
     def is_checkerboard_pattern(self, led_states: np.ndarray) -> bool:
         """Check if LED pattern is a checkerboard"""
-        expected_checkerboard = np.zeros((self.config.matrix_size, self.config.matrix_size), dtype=bool)
-        
-        for row in range(self.config.matrix_size):
-            for col in range(self.config.matrix_size):
-                expected_checkerboard[row, col] = (row + col) % 2 == 0
-        
         # Calculate similarity
-        similarity = np.sum(led_states == expected_checkerboard) / (self.config.matrix_size**2)
+        similarity = np.sum(led_states == self.checkerboard) / (self.config.matrix_size**2)
         return similarity > 0.8
     
     def extract_data_frames(self, frame_data: List[Tuple[np.ndarray, float]]) -> List[np.ndarray]:
         """Extract the three data frames from the transmission"""
-        if self.transmission_start_time is None:
+        if self.transmission_start_time is None or self.matrix_corners is None:
             return []
         
         data_frames = []
@@ -234,14 +230,14 @@ class LEDMatrixDetector:
                 led_states = self.detect_led_states(matrix_region)
                 z_pattern = self.convert_to_z_pattern(led_states)
                 data_frames.append(z_pattern)
-                logger.info(f"Data frame {len(data_frames)} extracted (time diff: {min_time_diff:.3f}s)")
+                logger.info("Data frame %d extracted (time diff: %.3fs)", len(data_frames), min_time_diff)
         
         return data_frames
     
     def decode_password(self, data_frames: List[np.ndarray]) -> Optional[str]:
         """Decode password from the three data frames"""
         if len(data_frames) != 3:
-            logger.error(f"Expected 3 data frames, got {len(data_frames)}")
+            logger.error("Expected 3 data frames, got %d", len(data_frames))
             return None
         
         # Combine frames into bit array (616 bits total)
@@ -253,28 +249,24 @@ class LEDMatrixDetector:
         # Extract CRC bits (last 16 bits)
         crc_bits = all_bits[600:616]
         
-        # Convert password bits to characters
-        password = ""
+        # Convert password bits to characters (as plain ints, not numpy scalars)
+        bit_values = password_bits.tolist()
+        chars = []
         for i in range(100):  # 100 characters
             # Extract 6 bits for each character
             start_bit = i * 6
             end_bit = start_bit + 6
-            char_bits = password_bits[start_bit:end_bit]
+            char_bits = bit_values[start_bit:end_bit]
             
             # Convert bits to value
             value = 0
             for bit in char_bits:
-                value = (value << 1) | int(bit)
+                value = (value << 1) | bit
             
             # Convert value to character
-            if value < 10:
-                char = str(value)
-            elif value < 36:
-                char = chr(ord('A') + value - 10)
-            else:
-                char = 'A'  # Default fallback
-            
-            password += char
+            chars.append(CHAR_TABLE[value])
+        
+        password = ''.join(chars)
         
         # Verify CRC
         if self.verify_crc(password_bits, crc_bits):
@@ -286,13 +278,14 @@ class LEDMatrixDetector:
     
     def verify_crc(self, data_bits: np.ndarray, crc_bits: np.ndarray) -> bool:
         """Verify CRC16-CCITT checksum"""
-        # Convert first 600 bits to 75 bytes
+        # Convert first 600 bits to 75 bytes (as plain ints, not numpy scalars)
+        bit_values = data_bits.tolist()
         data_bytes = []
         for i in range(75):
-            byte_bits = data_bits[i*8:(i+1)*8]
+            byte_bits = bit_values[i*8:(i+1)*8]
             byte_value = 0
             for bit in byte_bits:
-                byte_value = (byte_value << 1) | int(bit)
+                byte_value = (byte_value << 1) | bit
             data_bytes.append(byte_value)
         
         # Calculate CRC
@@ -304,13 +297,12 @@ class LEDMatrixDetector:
                     crc = (crc << 1) ^ 0x1021
                 else:
                     crc = crc << 1
-        
-        crc &= 0xFFFF
+                crc &= 0xFFFF
         
         # Convert received CRC bits to value
         received_crc = 0
-        for bit in crc_bits:
-            received_crc = (received_crc << 1) | int(bit)
+        for bit in crc_bits.tolist():
+            received_crc = (received_crc << 1) | bit
         
         return crc == received_crc
 
@@ -328,7 +320,7 @@ class LEDMatrixReceiver:
         """Initialize camera capture"""
         self.cap = cv2.VideoCapture(self.camera_index)
         if not self.cap.isOpened():
-            logger.error(f"Failed to open camera {self.camera_index}")
+            logger.error("Failed to open camera %s", self.camera_index)
             return False
         
         # Set camera properties
@@ -351,7 +343,7 @@ class LEDMatrixReceiver:
             logger.error("Camera not initialized")
             return
         
-        logger.info(f"Starting frame capture for {duration} seconds")
+        logger.info("Starting frame capture for %s seconds", duration)
         start_time = time.time()
         
         while time.time() - start_time < duration:
@@ -381,7 +373,7 @@ class LEDMatrixReceiver:
         frame_data = self.detector.frame_buffer.get_frames_in_range(start_time, end_time)
         
         if len(frame_data) < 10:
-            logger.error(f"Insufficient frames captured: {len(frame_data)}")
+            logger.error("Insufficient frames captured: %d", len(frame_data))
             return None
         
         # Detect calibration patterns
@@ -393,14 +385,14 @@ class LEDMatrixReceiver:
         data_frames = self.detector.extract_data_frames(frame_data)
         
         if len(data_frames) != 3:
-            logger.error(f"Failed to extract data frames: {len(data_frames)}")
+            logger.error("Failed to extract data frames: %d", len(data_frames))
             return None
         
         # Decode password
         password = self.detector.decode_password(data_frames)
         
         if password:
-            logger.info(f"Password decoded successfully: {password}")
+            logger.info("Password decoded successfully: %s", password)
         else:
             logger.error("Failed to decode password")
         
@@ -421,6 +413,9 @@ class LEDMatrixReceiver:
 
 def main():
     """Main function for testing the receiver"""
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
     receiver = LEDMatrixReceiver(camera_index=0)
     
     print("LED Matrix Receiver starting...")
@@ -4,6 +4,9 @@ from scipy import ndimage
 import os
 import time
 
+# Password character for each 6-bit value ('?' marks values past 'Z')
+CHAR_TABLE = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ" + "?" * 28
+
 class LEDPanelDecoder:
     def __init__(self, video_source=0, display=False):
         self.video_source = video_source
@@ -55,15 +58,16 @@ class LEDPanelDecoder:
         """Create 16x16 grid within panel boundaries"""
         x, y, w, h = bbox
         cell_centers = np.zeros((16, 16, 2), dtype=np.float32)
+        cell_w = w / 16
+        cell_h = h / 16
         
         for i in range(16):
+            center_y = y + (i + 0.5) * cell_h
             for j in range(16):
                 # Calculate center position with Z-pattern mapping
-                if i % 2 == 0:  # Left to right
-                    center_x = x + (j + 0.5) * (w / 16)
-                else:  # Right to left
-                    center_x = x + (15.5 - j) * (w / 16)
-                center_y = y + (i + 0.5) * (h / 16)
+                # (even rows left to right, odd rows right to left)
+                visual_col = j if i % 2 == 0 else 15 - j
+                center_x = x + (visual_col + 0.5) * cell_w
                 cell_centers[i, j] = [center_x, center_y]
                 
         return cell_centers
@@ -92,6 +96,34 @@ class LEDPanelDecoder:
             
         return np.mean(roi)
     
+    def get_led_intensities(self, frame, radius=5):
+        """Get average intensity for every LED in a single pass"""
+        intensities = np.zeros((16, 16))
+        if self.cell_centers is None:
+            return intensities
+        
+        # Use green channel (most sensitive in most cameras)
+        if len(frame.shape) == 3:
+            frame = frame[:, :, 1]
+        
+        # Same clipped sampling windows as get_led_intensity
+        height, width = frame.shape[:2]
+        cx = self.cell_centers[:, :, 0]
+        cy = self.cell_centers[:, :, 1]
+        x0 = np.clip(cx - radius, 0, width).astype(int)
+        y0 = np.clip(cy - radius, 0, height).astype(int)
+        x1 = np.clip(cx + radius, 0, width).astype(int)
+        y1 = np.clip(cy + radius, 0, height).astype(int)
+        
+        # Window sums from the integral image
+        integral = cv2.integral(frame)
+        sums = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+        area = (x1 - x0) * (y1 - y0)
+        
+        valid = (x1 > x0) & (y1 > y0)
+        intensities[valid] = sums[valid] / area[valid]
+        return intensities
+    
     def find_calibration_patterns(self):
         """Detect calibration frames in video stream"""
         calib1_frame = None
@@ -110,11 +142,7 @@ class LEDPanelDecoder:
                 self.cell_centers = self.define_grid(self.panel_bbox)
             
             # Check panel intensity
-            intensities = []
-            for i in range(16):
-                for j in range(16):
-                    intensity = self.get_led_intensity(frame, i, j)
-                    intensities.append(intensity)
+            intensities = self.get_led_intensities(frame).ravel().tolist()
             
             if np.mean(intensities) > 200:  # High intensity threshold
                 calib1_frame = frame
@@ -124,6 +152,13 @@ class LEDPanelDecoder:
         if calib1_frame is None:
             return False, "Calib1 not found"
         
+        # Expected checkerboard pattern is the same for every frame
+        expected = []
+        for i in range(16):
+            for j in range(16):
+                visual_col = j if i % 2 == 0 else 15 - j
+                expected.append(1 if (i + visual_col) % 2 == 0 else 0)
+        
         # Find calib2 (checkerboard pattern)
         start_time = time.time()
         while time.time() - start_time < 3:  # Timeout after 3 seconds
@@ -132,19 +167,16 @@ class LEDPanelDecoder:
                 break
                 
             # Verify checkerboard pattern
+            intensities = self.get_led_intensities(frame)
             errors = 0
-            expected = []
             for i in range(16):
                 for j in range(16):
-                    visual_col = j if i % 2 == 0 else 15 - j
-                    expected_val = 1 if (i + visual_col) % 2 == 0 else 0
-                    intensity = self.get_led_intensity(frame, i, j)
+                    intensity = intensities[i, j]
                     threshold = (self.calib1_intensities[i*16+j] * 0.5 + intensity * 0.5)
                     detected_val = 1 if intensity > threshold else 0
                     
-                    if detected_val != expected_val:
+                    if detected_val != expected[i*16+j]:
                         errors += 1
-                    expected.append(expected_val)
             
             if errors < 50:  # Allow some errors
                 calib2_frame = frame
@@ -156,11 +188,12 @@ class LEDPanelDecoder:
         
         # Calculate dynamic thresholds
         self.thresholds = np.zeros((16, 16))
+        black_refs = self.get_led_intensities(calib2_frame)
         for i in range(16):
             for j in range(16):
                 idx = i * 16 + j
                 white_ref = self.calib1_intensities[idx]
-                black_ref = self.get_led_intensity(calib2_frame, i, j)
+                black_ref = black_refs[i, j]
                 
                 if self.calib2_expected[idx] == 1:  # White in calib2
                     self.thresholds[i, j] = (white_ref + black_ref) * 0.4
@@ -177,9 +210,9 @@ class LEDPanelDecoder:
             if not ret:
                 return None
             frames.append(frame)
-            # Skip frames to account for 0.5s interval
+            # Skip frames to account for 0.5s interval (grab without retrieving)
             for _ in range(int(self.fps * 0.5) - 1):
-                self.cap.read()
+                self.cap.grab()
         return frames
     
     def extract_bits(self, frames):
@@ -190,14 +223,18 @@ class LEDPanelDecoder:
         for frame_idx, frame in enumerate(frames):
             bits.extend([0] * frame_bits[frame_idx])
             bit_count = 0
+            intensities = self.get_led_intensities(frame)
             
             for i in range(16):
+                # Skip the remaining rows once all frame bits are captured
+                if bit_count >= frame_bits[frame_idx]:
+                    break
                 for j in range(16):
                     # Stop when frame bits are captured
                     if bit_count >= frame_bits[frame_idx]:
                         break
                     
-                    intensity = self.get_led_intensity(frame, i, j)
+                    intensity = intensities[i, j]
                     threshold = self.thresholds[i, j]
                     bit = 1 if intensity > threshold else 0
                     
@@ -243,12 +280,7 @@ class LEDPanelDecoder:
             if len(chunk) < 6:
                 break
             value = int(''.join(map(str, chunk)), 2)
-            if value < 10:
-                password.append(chr(48 + value))  # 0-9
-            elif value < 36:
-                password.append(chr(65 + value - 10))  # A-Z
-            else:
-                password.append('?')  # Invalid
+            password.append(CHAR_TABLE[value])
         
         return ''.join(password), None
     